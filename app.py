@@ -1,14 +1,25 @@
 # app.py
 import random
-import json
-import calendar
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
 
-# OpenAI 최신 SDK
-from openai import OpenAI
+# orjson이 설치돼 있으면 bytes를 바로 파싱 (없으면 표준 json)
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    import json
+
+    _loads = json.loads
 
 
 # =========================
@@ -28,17 +39,38 @@ st.caption("오늘의 습관 + 기분 + 날씨 + 강아지(??)를 모아서 AI 
 # 유틸 함수
 # =========================
 def safe_pct(x, total):
+    # 기본 습관 5개일 때는 100 / 5 = 20 이므로 나눗셈 생략
+    if total == 5:
+        return x * 20
     if total <= 0:
         return 0
-    return int(round((x / total) * 100, 0))
+    return int(round(x * 100 / total))
+
+
+@lru_cache(maxsize=512)
+def _fmt_md(iso: str) -> str:
+    # "2025-01-31" -> "01/31" (기록 날짜는 바뀌지 않으므로 변환 결과 재사용)
+    try:
+        return datetime.fromisoformat(iso).strftime("%m/%d")
+    except Exception:
+        return iso
+
+
+@st.cache_resource(show_spinner=False)
+def _http_session():
+    # 리런/세션 간에 TCP+TLS 연결을 재사용
+    # 모든 세션이 공유하므로 호스트당 연결 풀을 넉넉하게
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    return session
 
 
 def _timeout_get(url, params=None, headers=None, timeout=10):
     try:
-        r = requests.get(url, params=params, headers=headers, timeout=timeout)
+        r = _http_session().get(url, params=params, headers=headers, timeout=timeout)
         if r.status_code != 200:
             return None
-        return r.json()
+        return _loads(r.content)
     except Exception:
         return None
 
@@ -46,18 +78,11 @@ def _timeout_get(url, params=None, headers=None, timeout=10):
 # =========================
 # API 연동 함수
 # =========================
-def get_weather(city: str, api_key: str, debug: bool = False):
+def _fetch_weather(city: str, api_key: str, debug: bool = False):
     """
-    OpenWeatherMap 현재 날씨 조회.
-    - 한국어
-    - 섭씨
-    실패 시 None 반환
+    OpenWeatherMap 현재 날씨 요청.
+    실패 시 예외 발생 (실패 결과가 캐시에 남지 않도록)
     """
-
-    api_key = (api_key or "").strip()
-    if not api_key:
-        return None
-
     url = "https://api.openweathermap.org/data/2.5/weather"
     params = {
         "q": city,  # 예: "Seoul,KR"
@@ -66,34 +91,81 @@ def get_weather(city: str, api_key: str, debug: bool = False):
         "lang": "kr",
     }
 
-    try:
-        r = requests.get(url, params=params, timeout=10)
+    r = _http_session().get(url, params=params, timeout=10)
 
-        # 디버그 모드면 사이드바에 원인 표시
-        if debug:
-            st.sidebar.write("🌦️ OpenWeather 응답 코드:", r.status_code)
-            st.sidebar.write("🌦️ OpenWeather 응답 본문(일부):", r.text[:300])
+    # 디버그 모드면 사이드바에 원인 표시
+    if debug:
+        st.sidebar.write("🌦️ OpenWeather 응답 코드:", r.status_code)
+        st.sidebar.write("🌦️ OpenWeather 응답 본문(일부):", r.text[:300])
 
-        if r.status_code != 200:
-            return None
+    if r.status_code != 200:
+        raise RuntimeError(f"OpenWeather 응답 코드 {r.status_code}")
 
-        data = r.json()
-
-        weather_desc = data["weather"][0]["description"]
-        temp = data["main"]["temp"]
-        feels_like = data["main"]["feels_like"]
-        humidity = data["main"]["humidity"]
-        wind = data.get("wind", {}).get("speed", None)
-
-        return {
-            "city": city,
-            "description": weather_desc,
-            "temp_c": float(temp),
-            "feels_like_c": float(feels_like),
-            "humidity": int(humidity),
-            "wind_mps": wind,
-        }
+    data = _loads(r.content)
+
+    weather_desc = data["weather"][0]["description"]
+    temp = data["main"]["temp"]
+    feels_like = data["main"]["feels_like"]
+    humidity = data["main"]["humidity"]
+    wind = data.get("wind", {}).get("speed", None)
+
+    return {
+        "city": city,
+        "description": weather_desc,
+        "temp_c": float(temp),
+        "feels_like_c": float(feels_like),
+        "humidity": int(humidity),
+        "wind_mps": wind,
+    }
+
+
+WEATHER_TTL_SEC = 600
+WEATHER_STORE_SIZE = 32
 
+
+@st.cache_resource(show_spinner=False)
+def _weather_store():
+    # 모든 세션이 공유하는 (도시, 키, 10분 구간) -> 날씨 dict 저장소 (LRU)
+    return OrderedDict(), threading.Lock()
+
+
+def _cached_weather(city: str, api_key: str):
+    # 현재 날씨는 분 단위로만 바뀌므로 같은 10분 구간 안에서는 재사용
+    # cache_data와 달리 히트 시 pickle 왕복 없이 dict 조회만 한다
+    store, lock = _weather_store()
+    key = (city, api_key, int(time.time() // WEATHER_TTL_SEC))
+
+    with lock:
+        if key in store:
+            store.move_to_end(key)
+            return store[key]
+
+    weather = _fetch_weather(city, api_key)
+
+    with lock:
+        store[key] = weather
+        while len(store) > WEATHER_STORE_SIZE:
+            store.popitem(last=False)
+    return weather
+
+
+def get_weather(city: str, api_key: str, debug: bool = False):
+    """
+    OpenWeatherMap 현재 날씨 조회.
+    - 한국어
+    - 섭씨
+    - 같은 도시/키는 10분간 캐시 (디버그 모드는 항상 새로 요청)
+    실패 시 None 반환
+    """
+
+    api_key = (api_key or "").strip()
+    if not api_key:
+        return None
+
+    try:
+        if debug:
+            return _fetch_weather(city, api_key, debug=True)
+        return _cached_weather(city, api_key)
     except Exception:
         return None
 
@@ -122,9 +194,31 @@ def get_dog_image():
         return None
 
 
+def _download_image(url: str) -> bytes:
+    """
+    이미지 bytes 다운로드 (리포트 스트리밍과 겹치도록 백그라운드에서 실행)
+    받은 bytes는 세션의 강아지 dict에 보관해서, 이후 리런에서는
+    브라우저가 dog.ceo에서 다시 받지 않도록 한다
+    실패 시 예외 발생
+    """
+    r = _http_session().get(url, timeout=10)
+    r.raise_for_status()
+    return r.content
+
+
 # =========================
 # AI 리포트 생성
 # =========================
+@st.cache_resource(max_entries=32, ttl=3600, show_spinner=False)
+def _openai_client(api_key: str):
+    # 키별로 클라이언트를 재사용해서 연결 풀(keep-alive)을 유지
+    # 사용자가 입력한 키(오타 포함)마다 생기므로 개수/보관 시간을 제한
+    # OpenAI SDK(httpx, pydantic 등)는 무거우므로 실제로 필요할 때 import
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key)
+
+
 SYSTEM_PROMPTS = {
     "스파르타 코치": """너는 매우 엄격하고 현실적인 스파르타 코치다.
 말투는 짧고 단호하며 변명은 허용하지 않는다.
@@ -138,6 +232,8 @@ SYSTEM_PROMPTS = {
 오글거림은 살짝 허용하지만 너무 길면 안 된다.""",
 }
 
+DEFAULT_SYSTEM_PROMPT = SYSTEM_PROMPTS["따뜻한 멘토"]
+
 OUTPUT_FORMAT_GUIDE = """
 출력은 반드시 아래 형식을 지켜라.
 
@@ -208,7 +304,7 @@ def generate_habit_recommendations(openai_api_key: str, goal: str, health_traits
 """.strip()
 
     try:
-        client = OpenAI(api_key=openai_api_key)
+        client = _openai_client(openai_api_key)
         res = client.chat.completions.create(
             model="gpt-5-mini",
             messages=[
@@ -216,9 +312,11 @@ def generate_habit_recommendations(openai_api_key: str, goal: str, health_traits
                 {"role": "user", "content": prompt},
             ],
             temperature=0.4,
+            # JSON 모드: 코드펜스/설명 없이 파싱 가능한 JSON만 반환
+            response_format={"type": "json_object"},
         )
         raw = res.choices[0].message.content.strip()
-        data = json.loads(raw)
+        data = _loads(raw)
         if isinstance(data, dict):
             cleaned = {}
             for k in ["운동", "영양", "마음건강"]:
@@ -233,9 +331,12 @@ def generate_habit_recommendations(openai_api_key: str, goal: str, health_traits
     return heuristic_recommendation(goal, health_traits)
 
 
-def build_month_calendar(selected_date, history_rows):
-    history_by_date = {row["date"]: row.get("pct", 0) for row in history_rows}
-    year, month = selected_date.year, selected_date.month
+@st.cache_data(max_entries=256, show_spinner=False)
+def build_month_calendar(year: int, month: int, history_tuple: tuple):
+    # history_tuple: ((date_iso, pct), ...) — 해시 가능한 형태라 캐시 키로 사용
+    import calendar
+
+    history_by_date = dict(history_tuple)
     cal = calendar.monthcalendar(year, month)
     table = []
     for week in cal:
@@ -252,7 +353,20 @@ def build_month_calendar(selected_date, history_rows):
     return table
 
 
-def generate_report(
+# 리포트 프롬프트의 고정 부분은 미리 만들어 두고, 호출마다 바뀌는 부분만 조립
+_REPORT_PROMPT_HEADER = "오늘의 체크인 데이터는 다음과 같다.\n"
+
+_REPORT_PROMPT_FOOTER = f"""
+요구사항:
+- 과장하지 말고 현실적인 조언을 해라.
+- 너무 길지 않게, 총 12~18줄 정도로 작성해라.
+- 사용자가 오늘 바로 행동을 바꿀 수 있게 구체적으로 말해라.
+
+{OUTPUT_FORMAT_GUIDE}
+""".strip()
+
+
+def generate_report_stream(
     openai_api_key: str,
     coach_style: str,
     habits_checked: list,
@@ -265,13 +379,14 @@ def generate_report(
     """
     습관+기분+날씨+강아지 품종을 모아서 OpenAI에 전달
     모델: gpt-5-mini
-    실패 시 None 반환
+    토큰이 도착하는 대로 내보내는 제너레이터 반환 (st.write_stream용)
+    키가 없으면 None 반환, 스트리밍 중 실패하면 제너레이터에서 예외 발생
     """
     openai_api_key = (openai_api_key or "").strip()
     if not openai_api_key:
         return None
 
-    system_prompt = SYSTEM_PROMPTS.get(coach_style, SYSTEM_PROMPTS["따뜻한 멘토"])
+    system_prompt = SYSTEM_PROMPTS.get(coach_style, DEFAULT_SYSTEM_PROMPT)
 
     weather_text = "날씨 정보 없음"
     if weather:
@@ -288,45 +403,44 @@ def generate_report(
     if dog:
         dog_text = f"- 품종(추정): {dog.get('breed','unknown')}"
 
-    user_prompt = f"""
-오늘의 체크인 데이터는 다음과 같다.
-
-[습관]
-- 달성: {", ".join(habits_checked) if habits_checked else "없음"}
-- 미달성: {", ".join(habits_missed) if habits_missed else "없음"}
-- 달성률: {achievement_pct}%
-
-[기분]
-- 점수: {mood}/10
-
-[날씨]
-{weather_text}
-
-[강아지]
-{dog_text}
-
-요구사항:
-- 과장하지 말고 현실적인 조언을 해라.
-- 너무 길지 않게, 총 12~18줄 정도로 작성해라.
-- 사용자가 오늘 바로 행동을 바꿀 수 있게 구체적으로 말해라.
-
-{OUTPUT_FORMAT_GUIDE}
-""".strip()
+    user_prompt = "\n".join(
+        [
+            _REPORT_PROMPT_HEADER,
+            "[습관]",
+            f"- 달성: {', '.join(habits_checked) if habits_checked else '없음'}",
+            f"- 미달성: {', '.join(habits_missed) if habits_missed else '없음'}",
+            f"- 달성률: {achievement_pct}%",
+            "",
+            "[기분]",
+            f"- 점수: {mood}/10",
+            "",
+            "[날씨]",
+            weather_text,
+            "",
+            "[강아지]",
+            dog_text,
+            "",
+            _REPORT_PROMPT_FOOTER,
+        ]
+    )
 
-    try:
-        client = OpenAI(api_key=openai_api_key)
+    def _stream():
+        client = _openai_client(openai_api_key)
 
-        res = client.chat.completions.create(
+        stream = client.chat.completions.create(
             model="gpt-5-mini",
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
             temperature=0.7,
+            stream=True,
         )
-        return res.choices[0].message.content.strip()
-    except Exception:
-        return None
+        for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ""
+
+    return _stream()
 
 
 # =========================
@@ -382,8 +496,9 @@ CITY_LIST = [
 
 COACH_STYLES = ["스파르타 코치", "따뜻한 멘토", "게임 마스터"]
 
+# 날짜(iso) -> 기록 row (항상 날짜 오름차순으로 유지)
 if "history" not in st.session_state:
-    st.session_state.history = []
+    st.session_state.history = {}
 
 if "today_saved" not in st.session_state:
     st.session_state.today_saved = False
@@ -400,6 +515,7 @@ if "last_dog" not in st.session_state:
 if "recommended_by_category" not in st.session_state:
     st.session_state.recommended_by_category = {}
 
+# 날짜(iso) -> 체크한 습관 이름 set
 if "daily_checklists" not in st.session_state:
     st.session_state.daily_checklists = {}
 
@@ -407,31 +523,31 @@ if "daily_checklists" not in st.session_state:
 # =========================
 # 데모용 6일 샘플 데이터 (초기 1회만)
 # =========================
-def init_demo_history_if_empty():
+def init_demo_history_if_empty(today):
     if st.session_state.history:
         return
 
-    today = datetime.now().date()
     base = today - timedelta(days=6)
 
-    demo = []
+    demo = {}
     for i in range(6):
         d = base + timedelta(days=i)
         checked = random.randint(1, 5)
         mood = random.randint(4, 9)
         pct = safe_pct(checked, 5)
-        demo.append(
-            {
-                "date": d.isoformat(),
-                "pct": pct,
-                "mood": mood,
-                "checked_count": checked,
-            }
-        )
+        demo[d.isoformat()] = {
+            "date": d.isoformat(),
+            "pct": pct,
+            "mood": mood,
+            "checked_count": checked,
+        }
     st.session_state.history = demo
 
 
-init_demo_history_if_empty()
+# 이번 리런의 오늘 날짜 (한 번만 계산해서 아래에서 재사용)
+today = datetime.now().date()
+
+init_demo_history_if_empty(today)
 
 
 # =========================
@@ -439,10 +555,14 @@ init_demo_history_if_empty()
 # =========================
 st.subheader("✅ 오늘의 습관 체크인")
 
-selected_date = st.date_input("📅 체크할 날짜", value=datetime.now().date())
+selected_date = st.date_input("📅 체크할 날짜", value=today)
 selected_date_str = selected_date.isoformat()
 
-calendar_rows = build_month_calendar(selected_date, st.session_state.history)
+calendar_rows = build_month_calendar(
+    selected_date.year,
+    selected_date.month,
+    tuple((r["date"], r.get("pct", 0)) for r in st.session_state.history.values()),
+)
 st.markdown("#### 🗓️ 달력 인터페이스")
 st.table(calendar_rows)
 
@@ -451,26 +571,34 @@ colA, colB = st.columns([1.2, 1.0], gap="large")
 with colA:
     st.markdown("#### 🧾 습관 체크")
 
-    left, right = st.columns(2, gap="medium")
-
     default_habits = [name for _, name in HABITS]
     recommended_flat = []
     for category, items in st.session_state.recommended_by_category.items():
         recommended_flat.extend([f"{category} | {item}" for item in items])
 
-    if selected_date_str not in st.session_state.daily_checklists:
-        base = {name: False for name in default_habits + recommended_flat}
-        st.session_state.daily_checklists[selected_date_str] = base
-
-    checked_map = st.session_state.daily_checklists[selected_date_str]
-    habit_items = list(checked_map.keys())
-
-    for idx, name in enumerate(habit_items):
-        target_col = left if idx % 2 == 0 else right
-        with target_col:
-            emoji = "✅" if "|" in name else "🧾"
-            checkbox_key = f"check_{selected_date_str}_{idx}_{name}"
-            checked_map[name] = st.checkbox(f"{emoji} {name}", value=checked_map[name], key=checkbox_key)
+    habit_items = default_habits + recommended_flat
+    checked_set = st.session_state.daily_checklists.setdefault(selected_date_str, set())
+
+    # 폼으로 묶어서 체크박스를 누를 때마다 리런되지 않고, 저장 버튼을 눌렀을 때만 반영
+    # (폼 밖의 리포트 버튼은 저장 안 된 체크를 볼 수 없으므로 폼 안에도 리포트 버튼을 둔다)
+    with st.form("daily_checkin"):
+        left, right = st.columns(2, gap="medium")
+
+        for idx, name in enumerate(habit_items):
+            target_col = left if idx % 2 == 0 else right
+            with target_col:
+                emoji = "✅" if "|" in name else "🧾"
+                checkbox_key = f"check_{selected_date_str}_{idx}_{name}"
+                if st.checkbox(f"{emoji} {name}", value=(name in checked_set), key=checkbox_key):
+                    checked_set.add(name)
+                else:
+                    checked_set.discard(name)
+
+        save_col, report_col = st.columns(2, gap="medium")
+        with save_col:
+            st.form_submit_button("💾 저장", use_container_width=True)
+        with report_col:
+            save_and_report = st.form_submit_button("🚀 저장하고 리포트 생성", use_container_width=True)
 
     st.markdown("---")
     mood = st.slider("🙂 오늘 기분은 어때요?", min_value=1, max_value=10, value=7, step=1)
@@ -482,7 +610,7 @@ with colB:
     coach_style = st.radio("코치 스타일", COACH_STYLES, index=1, horizontal=False)
 
     st.markdown("---")
-    st.info("체크인 후 아래에서 **컨디션 리포트 생성**을 눌러보세요!")
+    st.info("체크인 후 체크 목록의 **🚀 저장하고 리포트 생성**을 눌러보세요!")
 
     st.markdown("---")
     st.markdown("#### 🤖 습관 추천 챗봇")
@@ -515,10 +643,12 @@ if st.session_state.recommended_by_category:
 # =========================
 # 달성률 계산 + 메트릭
 # =========================
-checked_habits = [h for h in checked_map if checked_map[h]]
-missed_habits = [h for h in checked_map if not checked_map[h]]
+checked_habits, missed_habits = [], []
+for name in habit_items:
+    (checked_habits if name in checked_set else missed_habits).append(name)
 checked_count = len(checked_habits)
-achievement_pct = safe_pct(checked_count, len(checked_map))
+total_count = len(habit_items)
+achievement_pct = safe_pct(checked_count, total_count)
 
 st.markdown("---")
 st.subheader("📈 오늘의 달성률")
@@ -527,7 +657,7 @@ m1, m2, m3 = st.columns(3, gap="medium")
 with m1:
     st.metric("달성률", f"{achievement_pct}%")
 with m2:
-    st.metric("달성 습관", f"{checked_count}/{len(checked_map)}")
+    st.metric("달성 습관", f"{checked_count}/{total_count}")
 with m3:
     st.metric("기분", f"{mood}/10")
 
@@ -536,27 +666,25 @@ with m3:
 # 기록 저장 (session_state)
 # =========================
 def save_day(day_str):
+    history = st.session_state.history
+    is_new = day_str not in history
+    latest_day = next(reversed(history), None)
+    history[day_str] = {
+        "date": day_str,
+        "pct": achievement_pct,
+        "mood": mood,
+        "checked_count": checked_count,
+    }
 
-    found = False
-    for row in st.session_state.history:
-        if row["date"] == day_str:
-            row["pct"] = achievement_pct
-            row["mood"] = mood
-            row["checked_count"] = checked_count
-            found = True
-            break
-
-    if not found:
-        st.session_state.history.append(
-            {
-                "date": day_str,
-                "pct": achievement_pct,
-                "mood": mood,
-                "checked_count": checked_count,
-            }
-        )
+    # 보통은 최신 날짜가 맨 뒤에 붙으므로, 과거 날짜가 새로 들어왔을 때만 재정렬
+    if is_new and latest_day is not None and day_str < latest_day:
+        history = dict(sorted(history.items()))
+        st.session_state.history = history
+
+    # 최근 7일만 유지 (가장 오래된 날짜부터 제거)
+    while len(history) > 7:
+        del history[next(iter(history))]
 
-    st.session_state.history = sorted(st.session_state.history, key=lambda x: x["date"])[-7:]
     st.session_state.today_saved = True
 
 
@@ -569,13 +697,10 @@ save_day(selected_date_str)
 # =========================
 st.subheader("🗓️ 최근 7일 달성률")
 
-chart_rows = []
-for row in st.session_state.history:
-    try:
-        dt = datetime.fromisoformat(row["date"]).strftime("%m/%d")
-    except Exception:
-        dt = row["date"]
-    chart_rows.append({"날짜": dt, "달성률(%)": row["pct"]})
+chart_rows = [
+    {"날짜": _fmt_md(row["date"]), "달성률(%)": row["pct"]}
+    for row in st.session_state.history.values()
+]
 
 st.bar_chart(chart_rows, x="날짜", y="달성률(%)", height=260)
 
@@ -589,24 +714,40 @@ st.subheader("🧠 AI 코치 리포트")
 btn_col1, btn_col2 = st.columns([1, 2], gap="large")
 with btn_col1:
     generate_btn = st.button("🚀 컨디션 리포트 생성", type="primary", use_container_width=True)
+    generate_btn = generate_btn or save_and_report
 
 with btn_col2:
     st.caption("※ OpenAI 키가 없으면 리포트 생성이 안 돼요. 날씨 키가 없으면 날씨는 생략돼요.")
+    st.caption("※ 습관 체크를 바꿨다면 **💾 저장** 후 생성하거나, 체크 목록의 **🚀 저장하고 리포트 생성**을 눌러주세요.")
 
+report_stream = None
+image_future = None
 
 if generate_btn:
-    with st.spinner("날씨와 강아지를 불러오고, AI가 리포트를 작성 중..."):
+    with st.spinner("날씨와 강아지를 불러오는 중..."):
+
+        # 날씨 + 강아지 (동시에 요청)
+        # 강아지는 워커 스레드에서, 날씨는 사이드바 디버그 출력 때문에 메인 스레드에서 조회
+        # 리포트는 날씨/강아지 결과가 필요하므로, 그동안 OpenAI 클라이언트(SDK import 포함)만 미리 준비
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            dog_future = pool.submit(get_dog_image)
+            if openai_api_key.strip():
+                pool.submit(_openai_client, openai_api_key.strip())
+            weather = get_weather(city, weather_api_key, debug=debug_weather)
+            dog = dog_future.result()
 
-        # 날씨
-        weather = get_weather(city, weather_api_key, debug=debug_weather)
         st.session_state.last_weather = weather
-
-        # 강아지
-        dog = get_dog_image()
         st.session_state.last_dog = dog
 
-        # 리포트
-        report = generate_report(
+        # 리포트에는 품종만 필요하므로 사진은 기다리지 않고 백그라운드에서 받는다
+        # (이번 리런은 URL로 표시하고, 받은 bytes는 다음 리런부터 사용)
+        if dog:
+            image_pool = ThreadPoolExecutor(max_workers=1)
+            image_future = image_pool.submit(_download_image, dog["image_url"])
+            image_pool.shutdown(wait=False)
+
+        # 리포트 (실제 생성은 아래 출력 영역에서 스트리밍)
+        report_stream = generate_report_stream(
             openai_api_key=openai_api_key,
             coach_style=coach_style,
             habits_checked=checked_habits,
@@ -616,7 +757,10 @@ if generate_btn:
             weather=weather,
             dog=dog,
         )
-        st.session_state.last_report = report
+        # 키가 없으면 이전 리포트 대신 오류 표시
+        # (키가 있으면 새 리포트가 완성될 때까지 이전 리포트를 유지)
+        if report_stream is None:
+            st.session_state.last_report = None
 
 
 # 출력 영역
@@ -624,7 +768,7 @@ weather = st.session_state.last_weather
 dog = st.session_state.last_dog
 report = st.session_state.last_report
 
-if report or weather or dog:
+if report_stream is not None or report or weather or dog:
     c1, c2 = st.columns(2, gap="large")
 
     with c1:
@@ -643,27 +787,61 @@ if report or weather or dog:
         st.markdown("#### 🐶 오늘의 강아지")
         if dog:
             st.write(f"**품종(추정):** {dog.get('breed', 'unknown')}")
-            st.image(dog["image_url"], use_container_width=True)
+            # 서버에서 못 받았으면 브라우저가 URL로 직접 불러오도록
+            st.image(dog.get("image_bytes") or dog["image_url"], use_container_width=True)
         else:
             st.warning("강아지 이미지를 가져오지 못했어요. (네트워크 확인)")
 
     st.markdown("---")
     st.markdown("#### 📝 AI 코치 리포트")
 
-    if report:
+    if report_stream is not None:
+        # 토큰이 도착하는 대로 표시하고, 완성된 리포트를 저장
+        try:
+            streamed = st.write_stream(report_stream)
+        except Exception:
+            # 중간에 끊긴 리포트는 완성본처럼 저장/공유하지 않는다
+            st.session_state.last_report = report = None
+            st.error("AI 리포트 생성이 중간에 실패했어요. 위 내용은 완성되지 않은 리포트예요. (OpenAI API Key 또는 네트워크 확인)")
+        else:
+            report = streamed.strip() if isinstance(streamed, str) and streamed.strip() else None
+            st.session_state.last_report = report
+            if not report:
+                st.error("AI 리포트를 생성하지 못했어요. (OpenAI API Key 확인)")
+    elif report:
         st.markdown(report)
     else:
         st.error("AI 리포트를 생성하지 못했어요. (OpenAI API Key 확인)")
 
 
+# 리포트 스트리밍이 끝난 뒤에 사진 다운로드 결과를 세션에 보관
+if image_future is not None:
+    try:
+        st.session_state.last_dog["image_bytes"] = image_future.result()
+    except Exception:
+        pass
+
+
 # =========================
 # 공유용 텍스트
 # =========================
 if report:
-    share_text = f"""
+    # 입력이 바뀌었을 때만 공유 텍스트를 다시 만든다
+    share_key = (
+        report,
+        today.isoformat(),
+        city,
+        coach_style,
+        achievement_pct,
+        tuple(checked_habits),
+        tuple(missed_habits),
+        mood,
+    )
+    if st.session_state.get("_share_key") != share_key:
+        st.session_state["_share_text"] = f"""
 [AI 습관 트래커 공유]
 
-- 날짜: {datetime.now().date().isoformat()}
+- 날짜: {today.isoformat()}
 - 도시: {city}
 - 코치: {coach_style}
 - 달성률: {achievement_pct}%
@@ -674,10 +852,11 @@ if report:
 --- AI 리포트 ---
 {report}
 """.strip()
+        st.session_state["_share_key"] = share_key
 
     st.markdown("---")
     st.subheader("📤 공유용 텍스트")
-    st.code(share_text, language="text")
+    st.code(st.session_state["_share_text"], language="text")
 
 
 # =========================